@@ -1,20 +1,41 @@
 import json,sys
 from dataclasses import dataclass
 
-@dataclass
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+RATING_KEYS = ('poor', 'below_average', 'average', 'good', 'excellent')
+
+@dataclass(frozen=True)
 class Rating:
+    # Explicit __slots__ rather than dataclass(slots=True), which needs 3.10
+    __slots__ = RATING_KEYS
+
     poor: int
     below_average: int
     average: int
     good: int
     excellent: int
 
+    # Frozen + __slots__ needs explicit state handling for pickle/copy,
+    # as dataclass(slots=True) would generate
+    def __getstate__(self):
+        return self.to_list()
+
+    def __setstate__(self, state):
+        for name, value in zip(RATING_KEYS, state):
+            object.__setattr__(self, name, value)
+
     @classmethod
     def zero(cls):
         return cls(0, 0, 0, 0, 0)
 
     @classmethod
     def from_dict(cls, data):
+        # Extracted rows already hold ints; int() keeps older string-valued
+        # results.json files working
         return cls(
             poor = int(data['poor']),
             below_average = int(data['below_average']),
@@ -23,6 +44,18 @@ class Rating:
             excellent = int(data['excellent'])
         )
 
+    @classmethod
+    def from_rows(cls, rows):
+        # Total over many dicts in one pass, rather than add() per row
+        poor = below_average = average = good = excellent = 0
+        for row in rows:
+            poor += int(row['poor'])
+            below_average += int(row['below_average'])
+            average += int(row['average'])
+            good += int(row['good'])
+            excellent += int(row['excellent'])
+        return cls(poor, below_average, average, good, excellent)
+
     def add(self, other):
         return Rating(
             poor=self.poor + other.poor,
@@ -32,11 +65,20 @@ class Rating:
             excellent = self.excellent + other.excellent
         )
 
+    def _top1_sum(self):
+        return self.excellent
+
+    def _top2_sum(self):
+        return self.excellent + self.good
+
+    def _weighted_sum(self):
+        return 1 * self.poor + 2 * self.below_average + 3 * self.average + 4 * self.good + 5 * self.excellent
+
     def get_top1(self):
-        return 100 * self.excellent / self.get_count()
+        return 100 * self._top1_sum() / self.get_count()
 
     def get_top2(self):
-        return 100* (self.excellent + self.good) / self.get_count()
+        return 100 * self._top2_sum() / self.get_count()
 
     def to_list(self):
         return [self.poor, self.below_average, self.average, self.good, self.excellent]
@@ -45,29 +87,25 @@ class Rating:
         return self.poor + self.below_average + self.average + self.good + self.excellent
 
     def get_mean(self):
-        return (1 * self.poor + 2 * self.below_average + 3 * self.average + 4 * self.good + 5 * self.excellent) / self.get_count()
+        return self._weighted_sum() / self.get_count()
+
+    def get_summary(self):
+        # Top1, Top2 and Mean sharing a single get_count()
+        count = self.get_count()
+        return (
+            100 * self._top1_sum() / count,
+            100 * self._top2_sum() / count,
+            self._weighted_sum() / count,
+        )
 
 def main():
     filename = sys.argv[1]
     print(filename)
-    with open(filename) as fp:
-        data = json.load(fp)
-    excellents = 0
-    goods = 0
-    count = 0
-    ratings = []
-    total = Rating.zero()
-    for line in data:
-        rating = Rating.from_dict(line)
-        total = total.add(rating)
-        ratings.append(rating)
-        excellents += rating.excellent
-        goods += rating.good
-        count += int(line['count'])
-    top1 = total.excellent / count
-    top2 = (total.excellent + total.good) / count
-    t = total
-    print(f"Top1: {t.get_top1():.2f}% Top2: {t.get_top2():.2f}% Mean: {t.get_mean():.3f}")
+    with open(filename, 'rb') as fp:
+        data = orjson.loads(fp.read()) if orjson else json.load(fp)
+    total = Rating.from_rows(data)
+    top1, top2, mean = total.get_summary()
+    print(f"Top1: {top1:.2f}% Top2: {top2:.2f}% Mean: {mean:.3f}")
 
 
 if __name__ == '__main__':
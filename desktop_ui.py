@@ -8,9 +8,13 @@
 """
 
 import csv
+import io
 import json
+import multiprocessing
 import os
+import queue
 import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from pathlib import Path
@@ -18,6 +22,11 @@ from pathlib import Path
 import extract
 import calculate
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def _safe_float(x, default=None):
     try:
@@ -27,7 +36,10 @@ def _safe_float(x, default=None):
 
 
 def _write_json(path: Path, data):
-    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    if orjson:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
 
 
 def _write_csv(path: Path, rows):
@@ -36,29 +48,50 @@ def _write_csv(path: Path, rows):
         path.write_text("", encoding="utf-8")
         return
     headers = sorted({k for r in rows for k in r.keys()})
+    # Build the CSV in memory and write it out in one go
+    buf = io.StringIO()
+    w = csv.DictWriter(buf, fieldnames=headers)
+    w.writeheader()
+    w.writerows(rows)
     with path.open("w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=headers)
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
+        f.write(buf.getvalue())
+
+
+def _iter_pdfs(root, recursive, onerror=None):
+    """Yield os.DirEntry objects for the PDFs under root as they are found.
+
+    Unreadable folders are skipped, as Path.glob does; onerror, if given, is
+    called with the PermissionError (like os.walk's onerror).
+    """
+    try:
+        it = os.scandir(root)
+    except PermissionError as e:
+        if onerror is not None:
+            onerror(e)
+        return
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    yield from _iter_pdfs(entry.path, recursive, onerror)
+            elif entry.name.lower().endswith(".pdf") and entry.is_file():
+                yield entry
 
 
 def _compute_summary(extracted_rows):
     # extracted_rows are dicts from extract.process_pdf_file
-    ratings = [calculate.Rating.from_dict(x) for x in extracted_rows]
-    if not ratings:
+    if not extracted_rows:
         return None
 
-    total = calculate.Rating.zero()
-    for r in ratings:
-        total = total.add(r)
+    total = calculate.Rating.from_rows(extracted_rows)
 
     # calculate.py's main prints Top1/Top2/Mean using aggregated rating percentages.
     # We'll mirror that.
+    top1, top2, mean = total.get_summary()
     return {
-        "Top1_percent": total.get_top1(),
-        "Top2_percent": total.get_top2(),
-        "Mean": total.get_mean(),
+        "Top1_percent": top1,
+        "Top2_percent": top2,
+        "Mean": mean,
     }
 
 
@@ -74,7 +107,16 @@ class App(tk.Tk):
         self.status = tk.StringVar(value="Choose a PDF folder to begin.")
         self.progress = tk.DoubleVar(value=0.0)
 
+        # Worker -> UI events, applied in batches by _drain
+        self._events = queue.Queue()
+        self._cancel = threading.Event()
+        # Guards the switch into the write phase, after which cancel is ignored
+        self._cancel_lock = threading.Lock()
+        self._writing = False
+        self._executor = None
+
         self._build_ui()
+        self.after(100, self._drain)
 
     def _build_ui(self):
         pad = {"padx": 10, "pady": 8}
@@ -109,6 +151,8 @@ class App(tk.Tk):
         run_row.pack(fill="x", **pad)
         self.run_btn = ttk.Button(run_row, text="Run", command=self.run, state="disabled")
         self.run_btn.pack(side="left")
+        self.cancel_btn = ttk.Button(run_row, text="Cancel", command=self.cancel, state="disabled")
+        self.cancel_btn.pack(side="left", padx=(10, 0))
         ttk.Button(run_row, text="Open output folder", command=self.open_out_dir).pack(side="left", padx=(10, 0))
 
         # Progress + status
@@ -130,8 +174,10 @@ class App(tk.Tk):
         self.out_dir.trace_add("write", lambda *args: self._validate())
 
     def _validate(self):
-        pdf_ok = self.pdf_dir.get().strip() and Path(self.pdf_dir.get().strip()).exists()
-        out_ok = self.out_dir.get().strip() and Path(self.out_dir.get().strip()).exists()
+        pdf_dir = self.pdf_dir.get().strip()
+        out_dir = self.out_dir.get().strip()
+        pdf_ok = pdf_dir and Path(pdf_dir).exists()
+        out_ok = out_dir and Path(out_dir).exists()
         self.run_btn.configure(state=("normal" if (pdf_ok and out_ok) else "disabled"))
 
     def browse_pdf_dir(self):
@@ -191,35 +237,63 @@ class App(tk.Tk):
             )
             return
 
+        recursive = self.include_subdirs.get()
+        self._cancel.clear()
+        self._writing = False
         self.run_btn.configure(state="disabled")
+        self.cancel_btn.configure(state="normal")
         self.progress.set(0.0)
         self.status.set("Scanning PDFs…")
         self._log("Starting run…")
 
         def worker():
             try:
-                pattern = "**/*.pdf" if self.include_subdirs.get() else "*.pdf"
-                pdfs = sorted(pdf_dir.glob(pattern))
-                if not pdfs:
-                    self._ui_done(error="No PDFs found in the selected folder.")
-                    return
-
-                self._ui_status(f"Found {len(pdfs)} PDFs. Extracting…")
-                extracted = []
-                total = len(pdfs)
-
-                for i, p in enumerate(pdfs, start=1):
-                    self._ui_status(f"Extracting {i}/{total}: {p.name}")
-                    self._ui_progress((i - 1) / total * 100)
-
-                    try:
-                        row = extract.process_pdf_file(str(p))
-                        if row is not None:
-                            extracted.append(row)
-                        else:
-                            self._ui_log(f"[warn] No data extracted from: {p}")
-                    except Exception as e:
-                        self._ui_log(f"[error] Failed on {p}: {e}")
+                results = {}
+
+                # Each PDF is an independent pdftotext run + XML parse, so fan out
+                # across processes, submitting files as the scan finds them.
+                # Spawn rather than fork: this thread runs alongside the Tk main loop
+                # max_workers=None: one per CPU, capped at 61 on Windows
+                with ProcessPoolExecutor(
+                    max_workers=None, mp_context=multiprocessing.get_context("spawn")
+                ) as executor:
+                    self._executor = executor
+                    futures = {}
+                    for entry in _iter_pdfs(pdf_dir, recursive, self._skipped_folder):
+                        if self._cancel.is_set():
+                            break
+                        futures[executor.submit(extract.process_pdf_file, entry.path)] = entry
+                    if not futures and not self._cancel.is_set():
+                        self._ui_done(error="No PDFs found in the selected folder.")
+                        return
+
+                    total = len(futures)
+                    self._ui_status(f"Found {total} PDFs. Extracting…")
+                    for done, fut in enumerate(as_completed(futures), start=1):
+                        if self._cancel.is_set():
+                            break
+                        entry = futures[fut]
+                        self._ui_status(f"Extracted {done}/{total}: {entry.name}")
+                        self._ui_progress(done / total * 100)
+
+                        try:
+                            row = fut.result()
+                            if row is not None:
+                                results[entry.path] = row
+                            else:
+                                self._ui_log(f"[warn] No data extracted from: {entry.path}")
+                        except Exception as e:
+                            self._ui_log(f"[error] Failed on {entry.path}: {e}")
+
+                with self._cancel_lock:
+                    if self._cancel.is_set():
+                        self._ui_done(cancelled=True)
+                        return
+                    self._writing = True
+                self._ui_writing()
+
+                # Scan order is arbitrary; write results sorted by path
+                extracted = [results[path] for path in sorted(results, key=Path)]
 
                 self._ui_progress(100)
                 self._ui_status("Writing results…")
@@ -242,31 +316,98 @@ class App(tk.Tk):
                 self._ui_log(f"Wrote: {results_csv}")
                 self._ui_done(ok=True)
             except Exception as e:
-                self._ui_done(error=str(e))
+                if self._cancel.is_set():
+                    # e.g. submit() racing the executor shutdown in cancel()
+                    self._ui_done(cancelled=True)
+                else:
+                    self._ui_done(error=str(e))
+            finally:
+                self._executor = None
 
         threading.Thread(target=worker, daemon=True).start()
 
-    # Thread-safe UI updates
+    def _skipped_folder(self, e):
+        self._ui_log(f"[warn] Skipped unreadable folder: {e.filename}")
+
+    def cancel(self):
+        with self._cancel_lock:
+            if self._writing:
+                # Too late to cancel; results are already being written
+                return
+            self._cancel.set()
+        self.cancel_btn.configure(state="disabled")
+        self.status.set("Cancelling…")
+        executor = self._executor
+        if executor is not None:
+            # Drop queued PDFs; ones already running are left to finish
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # Thread-safe UI updates: the worker only queues events, and _drain
+    # applies everything pending from the Tk thread every 100ms.
     def _ui_log(self, msg):
-        self.after(0, lambda: self._log(msg))
+        self._events.put(("log", msg))
 
     def _ui_status(self, msg):
-        self.after(0, lambda: self.status.set(msg))
+        self._events.put(("status", msg))
 
     def _ui_progress(self, v):
-        self.after(0, lambda: self.progress.set(v))
+        self._events.put(("progress", v))
 
-    def _ui_done(self, ok=False, error=None):
-        def finish():
-            if error:
-                self.status.set("Failed")
-                messagebox.showerror("Run failed", error)
-            else:
-                self.status.set("Done")
-                if ok:
-                    messagebox.showinfo("Done", "Extraction and summary complete.")
-            self._validate()  # re-enable run button if inputs still valid
-        self.after(0, finish)
+    def _ui_writing(self):
+        self._events.put(("writing", None))
+
+    def _ui_done(self, ok=False, error=None, cancelled=False):
+        self._events.put(("done", (ok, error, cancelled)))
+
+    def _drain(self):
+        lines = []
+        status = progress = done = None
+        writing = False
+        try:
+            while True:
+                kind, value = self._events.get_nowait()
+                if kind == "log":
+                    lines.append(value)
+                elif kind == "status":
+                    status = value
+                elif kind == "progress":
+                    progress = value
+                elif kind == "writing":
+                    writing = True
+                elif kind == "done":
+                    done = value
+        except queue.Empty:
+            pass
+
+        try:
+            # Only the latest status/progress matter; logs go in as one insert
+            if lines:
+                self._log("\n".join(lines))
+            if writing:
+                self.cancel_btn.configure(state="disabled")
+            if status is not None:
+                self.status.set(status)
+            if progress is not None:
+                self.progress.set(progress)
+            if done is not None:
+                self._finish(*done)
+        finally:
+            # Keep polling even if applying an event raised
+            self.after(100, self._drain)
+
+    def _finish(self, ok, error, cancelled):
+        self.cancel_btn.configure(state="disabled")
+        if cancelled:
+            self.status.set("Cancelled")
+            self._log("Run cancelled; no results written.")
+        elif error:
+            self.status.set("Failed")
+            messagebox.showerror("Run failed", error)
+        else:
+            self.status.set("Done")
+            if ok:
+                messagebox.showinfo("Done", "Extraction and summary complete.")
+        self._validate()  # re-enable run button if inputs still valid
 
 
 if __name__ == "__main__":
@@ -6,44 +6,59 @@ count, and rating values from instructor evaluation data.
 """
 
 import xml.etree.ElementTree as ET
+import io
 import re
 import subprocess
-import tempfile
 import os
 import sys
 import argparse
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 #PDFTOTEXT = os.path.join(os.path.dirname(__file__), "bin/pdftotext.exe")
 LINE_TITLE = '15 Taking everything into account, the instructor was:'
 LINE_COLS = 'Field Mean Std Deviation Count'
-
-def extract_paren(s):
-    return s[1:-1]
+EVAL_RE = re.compile(r'(?:Evals?|Evaluation) -')
+# pdftotext -htmlmeta -bbox output is XHTML; tags are namespace-qualified
+XHTML_NS = 'http://www.w3.org/1999/xhtml'
+PAGE_TAG = f'{{{XHTML_NS}}}page'
+WORD_TAG = f'{{{XHTML_NS}}}word'
+# Extracted results are cached per (path, mtime, size); bump CACHE_VERSION
+# whenever the shape of the extracted data changes.
+CACHE_DIR = Path.home() / '.cache' / 'eval_averages'
+CACHE_VERSION = 2
 
 def extract_page(page):
-    words = []
-    for word in page.findall('.//*'):
-        words.append({
-            'text': word.text,
-            'x': float(word.get('xMin', 0)),
-            'y': float(word.get('yMin', 0))
-        })
+    # Keep word attributes in parallel lists rather than one dict per word
+    xs, ys, texts = [], [], []
+    # Only visit word elements, in the page's namespace if it has one
+    word_tag = WORD_TAG if XHTML_NS in page.tag else 'word'
+    for word in page.iter(word_tag):
+        xs.append(float(word.get('xMin', 0)))
+        ys.append(float(word.get('yMin', 0)))
+        texts.append(word.text)
 
+    if len(texts) == 0:
+        return []
     # Sort words by position (top to bottom, left to right)
-    words.sort(key=lambda w: (w['y'], w['x']))
+    order = sorted(range(len(texts)), key=lambda i: (ys[i], xs[i]))
 
     table = []
     line = []
-    if len(words) == 0:
-        return []
-    last_y = words[0]["y"]
-    for word in words:
-        if last_y != word["y"]:
+    last_y = ys[order[0]]
+    for i in order:
+        if last_y != ys[i]:
             table.append(" ".join(line))
-            last_y = word["y"]
+            last_y = ys[i]
             line = []
-        line.append(word["text"])
+        line.append(texts[i])
     table.append(" ".join(line))
 
     if len(table) > 0 and table[0] == 'There are no results yet to show. Please distribute your survey to gather responses.':
@@ -57,11 +72,10 @@ def extract_frontpage(table) -> Optional[Dict]:
     # 2020 Spring Evals - CS4XX-01 Instructor Name
     before = None
     after = None
-    for name in ["Eval", "Evals", "Evaluation"]:
-        if name + " -" in line:
-            before, after = line.split(name + " -")
-            break
-    if before is None and "CS" in line:
+    parts = EVAL_RE.split(line, maxsplit=1)
+    if len(parts) == 2:
+        before, after = parts
+    elif "CS" in line:
         before, after = line.split("CS", 1)
     if before is None:
         print(line, file=sys.stderr)
@@ -90,24 +104,47 @@ def extract_data_from_page(table) -> Optional[Dict]:
         return
     if table[0] != LINE_TITLE or table[1] != LINE_COLS:
         return
-    table = table[2:]
     # skip the offset of line2
-    line1 = table[0][len(LINE_TITLE) + 2:].split(' ')[-3:]
+    line1 = table[2][len(LINE_TITLE) + 2:].split(' ')[-3:]
     #print(line1)
     mean, stdev, count = line1
     # Last line: ['Poor', '(1)', 'Below', 'Average', '(2)', 'Average', '(7)', 'Good', '(7)', 'Excellent', '(10)']
     _, poor, _, _, below_average, _, average, _, good, _, excellent = table[-1].split(' ')
+    # [1:-1] strips the parentheses around each count; counts are parsed
+    # to int here once rather than by every consumer
     return {
         "mean": mean,
         "std_deviation": stdev,
-        "count": count,
-        "poor": extract_paren(poor),
-        "below_average": extract_paren(below_average),
-        "average": extract_paren(average),
-        "good": extract_paren(good),
-        "excellent": extract_paren(excellent)
+        "count": int(count),
+        "poor": int(poor[1:-1]),
+        "below_average": int(below_average[1:-1]),
+        "average": int(average[1:-1]),
+        "good": int(good[1:-1]),
+        "excellent": int(excellent[1:-1])
     }
 
+def _iter_pages(xml_content: str):
+    """
+    Stream page elements out of the pdftotext XML as each one finishes parsing.
+
+    Pages are cleared once the caller moves on, so only the current page's
+    words are kept in memory.
+    """
+    root = None
+    found = False
+    for _, elem in ET.iterparse(io.StringIO(xml_content), events=('end',)):
+        root = elem
+        # Match page elements with and without the XHTML namespace
+        if elem.tag == PAGE_TAG or elem.tag == 'page':
+            found = True
+            yield elem
+            elem.clear()
+    if not found and root is not None:
+        # If no page elements found, try searching all elements that might contain words
+        elements = root.findall('.//*')
+        print(f"No page elements found, searching all {len(elements)} elements")
+        yield from elements
+
 def parse_pdf_xml(xml_content: str) -> Dict:
     """
     Parse the XML content from pdftotext and extract instructor evaluation data.
@@ -118,45 +155,21 @@ def parse_pdf_xml(xml_content: str) -> Dict:
     Returns:
         Dictionary containing extracted data or None if not found
     """
+    frontpage = None
     try:
-        root = ET.fromstring(xml_content)
+        for idx, page in enumerate(_iter_pages(xml_content)):
+            table = extract_page(page)
+            if idx == 0:
+                frontpage = extract_frontpage(table)
+            else:
+                res = extract_data_from_page(table)
+                if res is not None:
+                    # Stop parsing as soon as the target page is found
+                    frontpage.update(res)
+                    return frontpage
     except ET.ParseError as e:
         print(f"Error parsing XML: {e}")
         return None
-
-    # Debug: Print the root element and first few child elements
-    #print(f"XML root element: {root.tag}")
-    
-    # Handle XHTML namespace
-    namespace = {'xhtml': 'http://www.w3.org/1999/xhtml'} if 'xhtml' in root.tag else {}
-    
-    # Try different element paths based on namespace
-    if namespace:
-        doc_elements = root.findall('.//xhtml:doc', namespace)
-        page_elements = root.findall('.//xhtml:page', namespace)
-    else:
-        doc_elements = root.findall('.//doc')
-        page_elements = root.findall('.//page')
-
-    # Find pages containing the target question
-    target_pages = []
-    # Look for page elements regardless of namespace
-    pages_to_search = page_elements
-    if not pages_to_search:
-        # If no page elements found, try searching all elements that might contain words
-        pages_to_search = root.findall('.//*')
-        print(f"No page elements found, searching all {len(pages_to_search)} elements")
-    frontpage = None
-    for idx, page in enumerate(pages_to_search):
-        # Try to find word elements with and without namespace
-        table = extract_page(page)
-        if idx == 0:
-            frontpage = extract_frontpage(table)
-        else:
-            res = extract_data_from_page(table)
-            if res is not None:
-                frontpage.update(res)
-                return frontpage
     return None
 
 
@@ -170,28 +183,15 @@ def pdf_to_xml(pdf_path: str) -> Optional[str]:
     Returns:
         XML content as string, or None if conversion failed
     """
-    if not os.path.exists(pdf_path):
-        print(f"Error: PDF file '{pdf_path}' not found.")
-        return None
-    
-    # Create temporary file for XML output
-    with tempfile.NamedTemporaryFile(mode='w+', suffix='.xml', delete=False) as temp_file:
-        temp_xml_path = temp_file.name
-    
     try:
-        # Run pdftotext command
-        cmd = ['pdftotext', '-htmlmeta', '-bbox', pdf_path, temp_xml_path]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        
-        # Read the generated XML file
-        with open(temp_xml_path, 'r', encoding='utf-8') as f:
-            xml_content = f.read()
-            
-        return xml_content
-        
+        # Run pdftotext command, writing the XML to stdout ("-")
+        cmd = ['pdftotext', '-htmlmeta', '-bbox', pdf_path, '-']
+        result = subprocess.run(cmd, capture_output=True, check=True)
+        return result.stdout.decode('utf-8')
+
     except subprocess.CalledProcessError as e:
         print(f"Error running pdftotext: {e}")
-        print(f"stderr: {e.stderr}")
+        print(f"stderr: {e.stderr.decode('utf-8', errors='replace')}")
         return None
     except FileNotFoundError:
         print("Error: pdftotext command not found. Please install poppler-utils.")
@@ -201,14 +201,19 @@ def pdf_to_xml(pdf_path: str) -> Optional[str]:
     except Exception as e:
         print(f"Unexpected error: {e}")
         return None
-    finally:
-        # Clean up temporary file
-        if os.path.exists(temp_xml_path):
-            os.unlink(temp_xml_path)
+
+def _cache_file(pdf_path: str) -> Path:
+    """Return the cache file for the current version of pdf_path."""
+    st = os.stat(pdf_path)
+    key = f"{CACHE_VERSION}|{os.path.abspath(pdf_path)}|{st.st_mtime_ns}|{st.st_size}"
+    return CACHE_DIR / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
 
 def process_pdf_file(pdf_path: str) -> Optional[Dict]:
     """
     Process a PDF file end-to-end: convert to XML and extract data.
+
+    Results are cached on disk under CACHE_DIR, so unchanged files are not
+    run through pdftotext again.
     
     Args:
         pdf_path: Path to the input PDF file
@@ -216,6 +221,20 @@ def process_pdf_file(pdf_path: str) -> Optional[Dict]:
     Returns:
         Dictionary containing extracted data or None if processing failed
     """
+    try:
+        cache_file = _cache_file(pdf_path)
+    except FileNotFoundError:
+        print(f"Error: PDF file '{pdf_path}' not found.")
+        return None
+    except OSError:
+        cache_file = None
+    if cache_file is not None and cache_file.exists():
+        try:
+            raw = cache_file.read_bytes()
+            return orjson.loads(raw) if orjson else json.loads(raw)
+        except (OSError, ValueError):
+            pass
+
     # Convert PDF to XML
     xml_content = pdf_to_xml(pdf_path)
     if not xml_content:
@@ -223,6 +242,12 @@ def process_pdf_file(pdf_path: str) -> Optional[Dict]:
     
     # Extract data from XML
     data = parse_pdf_xml(xml_content)
+    if data is not None and cache_file is not None:
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            cache_file.write_bytes(orjson.dumps(data) if orjson else json.dumps(data).encode('utf-8'))
+        except OSError:
+            pass
     return data
 
 def main():
@@ -249,9 +274,11 @@ def main():
             return
     # Process PDF file
     output = []
+    # pdftotext runs in a subprocess, so a thread pool overlaps the next
+    # files' conversions with parsing the current one; map keeps input order
+    executor = ThreadPoolExecutor(max_workers=os.cpu_count())
     try:
-        for f in args.pdf_file:
-            result = process_pdf_file(f)
+        for f, result in zip(args.pdf_file, executor.map(process_pdf_file, args.pdf_file)):
             if result is not None:
                 output.append(result)
             else:
@@ -259,7 +286,12 @@ def main():
     except KeyboardInterrupt:
         pass
     finally:
-        print(json.dumps(output))
+        executor.shutdown(wait=False, cancel_futures=True)
+        if orjson:
+            sys.stdout.flush()
+            sys.stdout.buffer.write(orjson.dumps(output) + b"\n")
+        else:
+            print(json.dumps(output))
 
 
 if __name__ == "__main__":